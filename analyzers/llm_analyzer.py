@@ -1,197 +1,406 @@
 import asyncio
-import json
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import functools
+import hashlib
+import itertools
+from collections import Counter, defaultdict
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from datetime import datetime, timedelta
+import numpy as np
 import openai
-from sqlalchemy.orm import Session
+import orjson
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, joinedload
 import tiktoken
 
 from config.settings import settings
-from models.database import Message, MessageAnalysis, PotentialCustomer, ChannelAnalysis
+from models.database import Message, MessageAnalysis, PotentialCustomer, ChannelAnalysis, LLMResponseCache
+from utils.rate_limiter import RateLimiter
 
 import logging
 logger = logging.getLogger(__name__)
 
+# Static instructions live in the system message so OpenAI's prompt
+# caching can reuse them; only the compact message payload varies per call
+SYSTEM_PROMPT = f"""You are an expert at identifying potential customers from conversations.
+
+Analyze the Discord messages provided as a JSON array to identify potential customers for a startup.
+For each message that shows customer intent, extract:
+1. Intent score (0-1): How likely is this person to be a potential customer?
+2. Intent type: What kind of intent are they showing? (seeking_solution, expressing_frustration, asking_recommendation, researching_options, etc.)
+3. Pain points: What problems are they facing?
+4. Interests: What are they looking for?
+5. Keywords: Important keywords from their message
+
+Focus on messages that contain:
+- {', '.join(settings.CUSTOMER_KEYWORDS)}
+
+Return a JSON array with analysis for ONLY messages showing customer intent:
+[
+  {{
+    "message_id": 123,
+    "author": "username",
+    "intent_score": 0.85,
+    "intent_type": "seeking_solution",
+    "pain_points": ["specific problem"],
+    "interests": ["what they want"],
+    "keywords": ["important", "words"],
+    "explanation": "Why this is a potential customer"
+  }}
+]
+
+Only include messages with intent_score > 0.3"""
+
+def _json_array_union(existing, incoming):
+    """SQLite JSON1 expression: distinct union of two JSON arrays.
+
+    Lets the upsert merge pain_points/interests server-side instead of
+    round-tripping both lists through Python sets.
+    """
+    a = func.json_each(existing).table_valued('value')
+    b = func.json_each(incoming).table_valued('value')
+    union = select(a.c.value).union(select(b.c.value)).subquery()
+    return select(func.json_group_array(union.c.value)).scalar_subquery()
+
+def _chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Yield successive lists of up to size items from an iterable"""
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+@functools.lru_cache(maxsize=8)
+def _get_encoding(model: str) -> tiktoken.Encoding:
+    """Get the tiktoken encoding for a model, cached across instances"""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
 class LLMAnalyzer:
     def __init__(self):
         self.client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.encoding = tiktoken.encoding_for_model(settings.OPENAI_MODEL)
+        self.encoding = _get_encoding(settings.OPENAI_MODEL)
+        self._system_tokens = len(self.encoding.encode(SYSTEM_PROMPT))
+        self._semaphore = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENCY)
+        self._rate_limiter = RateLimiter(
+            requests_per_minute=settings.OPENAI_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.OPENAI_TOKENS_PER_MINUTE
+        )
+        self._summary_cache: Dict[Tuple[int, int], str] = {}
+        self._db_lock = asyncio.Lock()
         
     async def analyze_channel(self, db: Session, channel_id: int) -> Dict[str, Any]:
         """Analyze all messages in a channel"""
-        # Get messages from database
-        messages = db.query(Message).filter_by(channel_id=channel_id).all()
-        
-        if not messages:
-            return {"status": "no_messages", "potential_customers": []}
-        
-        logger.info(f"Analyzing {len(messages)} messages from channel {channel_id}")
-        
+        # Stream messages instead of materializing the whole channel;
+        # authors are joined eagerly so batch prep never lazy-loads
+        messages = (
+            db.query(Message)
+            .options(joinedload(Message.author))
+            .filter_by(channel_id=channel_id)
+            .yield_per(1000)
+        )
+
+        # Identical contents ("gm", stickers, reposts) get one analysis;
+        # results are fanned back out to the duplicates afterwards
+        representatives: Dict[str, Message] = {}
+        duplicates: Dict[int, List[Message]] = defaultdict(list)
+
+        def unique_messages():
+            for msg in messages:
+                key = hashlib.sha256(msg.content.encode()).hexdigest()
+                rep = representatives.get(key)
+                if rep is None:
+                    representatives[key] = msg
+                    yield msg
+                else:
+                    duplicates[rep.id].append(msg)
+
         # Batch messages for analysis
-        batches = self._create_message_batches(messages)
+        batches = list(self._create_message_batches(db, unique_messages()))
+
+        if not batches:
+            return {"status": "no_messages", "potential_customers": []}
+
+        total_messages = sum(len(batch) for batch, _ in batches)
+        logger.info(f"Analyzing {total_messages} messages from channel {channel_id}")
         
+        # Fan out batches concurrently; the semaphore caps in-flight requests
+        batch_results = await asyncio.gather(
+            *[self._analyze_message_batch(db, batch, tokens) for batch, tokens in batches],
+            return_exceptions=True
+        )
+
         all_analyses = []
-        for i, batch in enumerate(batches):
-            logger.info(f"Processing batch {i+1}/{len(batches)}")
-            batch_analysis = await self._analyze_message_batch(db, batch)
+        for i, batch_analysis in enumerate(batch_results):
+            if isinstance(batch_analysis, Exception):
+                logger.error(f"Batch {i+1}/{len(batches)} failed: {batch_analysis}")
+                continue
             all_analyses.extend(batch_analysis)
-            
-            # Rate limiting
-            await asyncio.sleep(settings.OPENAI_RATE_LIMIT_DELAY)
-        
+
+        # Copy results onto messages that were deduplicated away
+        await self._run_db(self._propagate_duplicate_analyses, db, duplicates, all_analyses)
+
         # Aggregate results
-        aggregated_results = await self._aggregate_analyses(db, all_analyses)
+        aggregated_results = await self._aggregate_analyses(db, channel_id, all_analyses)
         
         # Save channel analysis
-        self._save_channel_analysis(db, channel_id, aggregated_results)
-        
+        await self._run_db(self._save_channel_analysis, db, channel_id, aggregated_results)
+
         return aggregated_results
+
+    async def _run_db(self, fn, *args):
+        """Run a blocking DB operation in a worker thread.
+
+        The Session is not thread-safe, so operations are serialized behind
+        a lock; the event loop stays free to dispatch OpenAI calls while
+        persistence is in flight.
+        """
+        async with self._db_lock:
+            return await asyncio.to_thread(fn, *args)
     
-    def _create_message_batches(self, messages: List[Message]) -> List[List[Message]]:
-        """Create batches of messages based on token count"""
-        batches = []
+    def _create_message_batches(self, db: Session, messages: Iterable[Message]) -> Iterator[Tuple[List[Message], int]]:
+        """Yield batches of messages based on token count.
+
+        Accepts any iterable (including a yield_per stream) and only keeps
+        the current chunk and the batch under construction in memory.
+        """
         current_batch = []
         current_tokens = 0
-        max_tokens = 3000  # Leave room for prompt
-        
-        for msg in messages:
-            msg_tokens = len(self.encoding.encode(msg.content))
-            
-            if current_tokens + msg_tokens > max_tokens and current_batch:
-                batches.append(current_batch)
-                current_batch = []
-                current_tokens = 0
-            
-            current_batch.append(msg)
-            current_tokens += msg_tokens
-        
+        # Exact budget: context window minus system prompt, reserved output
+        # tokens, and a small margin for JSON framing — further capped at
+        # the per-minute token quota, since a batch above it could never
+        # clear the rate limiter (and its per-message analyses would not
+        # fit in the reserved output tokens anyway)
+        max_tokens = min(
+            settings.OPENAI_CONTEXT_WINDOW
+            - self._system_tokens
+            - settings.OPENAI_MAX_OUTPUT_TOKENS
+            - 200,
+            settings.OPENAI_TOKENS_PER_MINUTE
+        )
+        counts_dirty = False
+
+        for chunk in _chunked(messages, 1000):
+            # Tokenize only messages without a cached count, per chunk, so
+            # tiktoken can parallelize in Rust; persist counts for re-analyses
+            uncounted = [msg for msg in chunk if msg.token_count is None]
+            if uncounted:
+                token_lists = self.encoding.encode_batch([msg.content for msg in uncounted])
+                for msg, tokens in zip(uncounted, token_lists):
+                    msg.token_count = len(tokens)
+                counts_dirty = True
+
+            # Find batch boundaries with cumsum + searchsorted in C rather
+            # than testing the budget once per message in Python
+            counts = np.fromiter(
+                (msg.token_count for msg in chunk), dtype=np.int64, count=len(chunk)
+            )
+            start = 0
+            while start < len(chunk):
+                cumulative = np.cumsum(counts[start:]) + current_tokens
+                cut = int(np.searchsorted(cumulative, max_tokens, side='right'))
+
+                if cut == 0:
+                    if current_batch:
+                        yield (current_batch, current_tokens)
+                        current_batch = []
+                        current_tokens = 0
+                        continue
+                    cut = 1  # Single message over budget still gets a batch
+
+                current_batch.extend(chunk[start:start + cut])
+                current_tokens += int(counts[start:start + cut].sum())
+                start += cut
+
+        if counts_dirty:
+            db.commit()
+
         if current_batch:
-            batches.append(current_batch)
-            
-        return batches
-    
-    async def _analyze_message_batch(self, db: Session, messages: List[Message]) -> List[Dict[str, Any]]:
+            yield (current_batch, current_tokens)
+
+    async def _analyze_message_batch(self, db: Session, messages: List[Message], estimated_tokens: int = 0) -> List[Dict[str, Any]]:
         """Analyze a batch of messages using LLM"""
         # Prepare messages for analysis
         message_data = [
             {
                 "id": msg.id,
-                "author": msg.author_name,
+                "author": msg.author.name,
                 "content": msg.content,
                 "timestamp": msg.created_at.isoformat()
             }
             for msg in messages
         ]
         
-        prompt = f"""Analyze the following Discord messages to identify potential customers for a startup.
-For each message that shows customer intent, extract:
-1. Intent score (0-1): How likely is this person to be a potential customer?
-2. Intent type: What kind of intent are they showing? (seeking_solution, expressing_frustration, asking_recommendation, researching_options, etc.)
-3. Pain points: What problems are they facing?
-4. Interests: What are they looking for?
-5. Keywords: Important keywords from their message
+        user_content = orjson.dumps(message_data).decode()
 
-Focus on messages that contain:
-- {', '.join(settings.CUSTOMER_KEYWORDS)}
+        # Identical content + model means an identical response; skip OpenAI
+        cache_key = hashlib.sha256(
+            settings.OPENAI_MODEL.encode() + orjson.dumps(message_data, option=orjson.OPT_SORT_KEYS)
+        ).hexdigest()
 
-Messages to analyze:
-{json.dumps(message_data, indent=2)}
+        try:
+            content = await self._run_db(self._get_cached_response, db, cache_key)
 
-Return a JSON array with analysis for ONLY messages showing customer intent:
-[
-  {{
-    "message_id": 123,
-    "author": "username",
-    "intent_score": 0.85,
-    "intent_type": "seeking_solution",
-    "pain_points": ["specific problem"],
-    "interests": ["what they want"],
-    "keywords": ["important", "words"],
-    "explanation": "Why this is a potential customer"
-  }}
-]
+            if content is None:
+                async with self._semaphore:
+                    await self._rate_limiter.acquire(estimated_tokens)
+                    response = await self.client.chat.completions.create(
+                        model=settings.OPENAI_MODEL,
+                        messages=[
+                            {"role": "system", "content": SYSTEM_PROMPT},
+                            {"role": "user", "content": user_content}
+                        ],
+                        temperature=0.3,
+                        response_format={ "type": "json_object" }
+                    )
 
-Only include messages with intent_score > 0.3"""
+                if response.usage:
+                    self._rate_limiter.release_actual(estimated_tokens, response.usage.total_tokens)
 
-        try:
-            response = await self.client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": "You are an expert at identifying potential customers from conversations."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                response_format={ "type": "json_object" }
-            )
-            
-            result = json.loads(response.choices[0].message.content)
+                content = response.choices[0].message.content
+                await self._run_db(self._store_cached_response, db, cache_key, content)
+
+            result = orjson.loads(content)
             analyses = result if isinstance(result, list) else result.get('analyses', [])
             
-            # Save individual message analyses
-            for analysis in analyses:
-                msg = next((m for m in messages if m.id == analysis['message_id']), None)
-                if msg:
-                    self._save_message_analysis(db, msg, analysis)
-            
+            # Save all message analyses for the batch in one transaction
+            await self._run_db(self._save_batch_analyses, db, messages, analyses)
+
             return analyses
             
         except Exception as e:
             logger.error(f"Error analyzing message batch: {e}")
             return []
     
-    def _save_message_analysis(self, db: Session, message: Message, analysis: Dict[str, Any]):
-        """Save message analysis to database"""
+    def _get_cached_response(self, db: Session, cache_key: str) -> Optional[str]:
+        """Look up a cached LLM response that hasn't expired"""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.LLM_CACHE_TTL_SECONDS)
+        cached = (
+            db.query(LLMResponseCache)
+            .filter(
+                LLMResponseCache.cache_key == cache_key,
+                LLMResponseCache.created_at >= cutoff
+            )
+            .first()
+        )
+        return cached.response if cached else None
+
+    def _store_cached_response(self, db: Session, cache_key: str, content: str):
+        """Store a raw LLM response for reuse"""
         try:
-            # Check if analysis already exists
-            existing = db.query(MessageAnalysis).filter_by(message_id=message.id).first()
-            
-            if not existing:
-                msg_analysis = MessageAnalysis(
-                    message_id=message.id,
-                    intent_score=analysis.get('intent_score', 0),
-                    intent_type=analysis.get('intent_type', ''),
-                    sentiment='neutral',  # Can be enhanced later
-                    keywords=analysis.get('keywords', []),
-                    insights=analysis.get('explanation', '')
-                )
-                db.add(msg_analysis)
+            existing = db.query(LLMResponseCache).filter_by(cache_key=cache_key).first()
+            if existing:
+                existing.response = content
+                existing.created_at = datetime.utcnow()
+            else:
+                db.add(LLMResponseCache(cache_key=cache_key, response=content))
+            db.commit()
+        except Exception as e:
+            logger.error(f"Error caching LLM response: {e}")
+            db.rollback()
+
+    def _save_batch_analyses(self, db: Session, messages: List[Message], analyses: List[Dict[str, Any]]):
+        """Bulk-insert message analyses for a batch in a single transaction"""
+        try:
+            valid_ids = {m.id for m in messages}
+            candidate_ids = [
+                a['message_id'] for a in analyses
+                if a.get('message_id') in valid_ids
+            ]
+            if not candidate_ids:
+                return
+
+            # Single pre-filter query instead of one existence check per row
+            existing_ids = {
+                row.message_id
+                for row in db.query(MessageAnalysis.message_id)
+                .filter(MessageAnalysis.message_id.in_(candidate_ids))
+                .all()
+            }
+
+            new_rows = [
+                {
+                    'message_id': a['message_id'],
+                    'intent_score': a.get('intent_score', 0),
+                    'intent_type': a.get('intent_type', ''),
+                    'sentiment': 'neutral',  # Can be enhanced later
+                    'keywords': a.get('keywords', []),
+                    'insights': a.get('explanation', '')
+                }
+                for a in analyses
+                if a.get('message_id') in valid_ids
+                and a['message_id'] not in existing_ids
+            ]
+
+            if new_rows:
+                db.execute(insert(MessageAnalysis), new_rows)
                 db.commit()
-                
+
         except Exception as e:
-            logger.error(f"Error saving message analysis: {e}")
+            logger.error(f"Error saving message analyses: {e}")
             db.rollback()
     
-    async def _aggregate_analyses(self, db: Session, analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _propagate_duplicate_analyses(self, db: Session, duplicates: Dict[int, List[Message]], analyses: List[Dict[str, Any]]):
+        """Copy each representative's analysis to its duplicate messages"""
+        if not duplicates:
+            return
+
+        try:
+            rows = []
+            for analysis in analyses:
+                for dup in duplicates.get(analysis.get('message_id'), ()):
+                    rows.append({
+                        'message_id': dup.id,
+                        'intent_score': analysis.get('intent_score', 0),
+                        'intent_type': analysis.get('intent_type', ''),
+                        'sentiment': 'neutral',
+                        'keywords': analysis.get('keywords', []),
+                        'insights': analysis.get('explanation', '')
+                    })
+            if not rows:
+                return
+
+            existing_ids = {
+                row.message_id
+                for row in db.query(MessageAnalysis.message_id)
+                .filter(MessageAnalysis.message_id.in_([r['message_id'] for r in rows]))
+                .all()
+            }
+            new_rows = [r for r in rows if r['message_id'] not in existing_ids]
+
+            if new_rows:
+                db.execute(insert(MessageAnalysis), new_rows)
+                db.commit()
+
+        except Exception as e:
+            logger.error(f"Error propagating duplicate analyses: {e}")
+            db.rollback()
+
+    async def _aggregate_analyses(self, db: Session, channel_id: int, analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Aggregate individual analyses into customer profiles"""
         # Group by author
-        author_data = {}
+        author_data = defaultdict(lambda: {
+            'analyses': [],
+            'pain_points': set(),
+            'interests': set(),
+            'total_score': 0.0,
+            'message_count': 0
+        })
         for analysis in analyses:
-            author = analysis['author']
-            if author not in author_data:
-                author_data[author] = {
-                    'analyses': [],
-                    'pain_points': set(),
-                    'interests': set(),
-                    'total_score': 0,
-                    'message_count': 0
-                }
-            
-            author_data[author]['analyses'].append(analysis)
-            author_data[author]['pain_points'].update(analysis.get('pain_points', []))
-            author_data[author]['interests'].update(analysis.get('interests', []))
-            author_data[author]['total_score'] += analysis.get('intent_score', 0)
-            author_data[author]['message_count'] += 1
+            data = author_data[analysis['author']]
+            data['analyses'].append(analysis)
+            data['pain_points'].update(analysis.get('pain_points', []))
+            data['interests'].update(analysis.get('interests', []))
+            data['total_score'] += analysis.get('intent_score', 0)
+            data['message_count'] += 1
         
         # Create potential customer profiles
         potential_customers = []
-        
+
         for author, data in author_data.items():
             avg_score = data['total_score'] / data['message_count']
-            
+
             if avg_score > 0.5:  # Threshold for potential customer
-                # Get or create potential customer
-                self._update_potential_customer(db, author, data, avg_score)
-                
                 potential_customers.append({
                     'username': author,
                     'score': avg_score,
@@ -200,7 +409,10 @@ Only include messages with intent_score > 0.3"""
                     'message_count': data['message_count'],
                     'engagement_level': self._calculate_engagement_level(avg_score, data['message_count'])
                 })
-        
+
+        # Merge all customer profiles in a single upsert
+        await self._run_db(self._upsert_potential_customers, db, potential_customers)
+
         # Sort by score
         potential_customers.sort(key=lambda x: x['score'], reverse=True)
         
@@ -208,42 +420,50 @@ Only include messages with intent_score > 0.3"""
             'status': 'success',
             'total_messages_analyzed': len(analyses),
             'potential_customers': potential_customers,
-            'summary': await self._generate_summary(potential_customers)
+            'summary': self._generate_summary(channel_id, potential_customers, len(analyses))
         }
     
-    def _update_potential_customer(self, db: Session, username: str, data: Dict[str, Any], score: float):
-        """Update or create potential customer record"""
+    def _upsert_potential_customers(self, db: Session, profiles: List[Dict[str, Any]]):
+        """Merge all customer profiles in one dialect-native upsert"""
+        if not profiles:
+            return
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                # For now, use username as ID (in real implementation, use Discord user ID)
+                'discord_user_id': p['username'],
+                'username': p['username'],
+                'score': p['score'],
+                'pain_points': p['pain_points'],
+                'interests': p['interests'],
+                'engagement_level': p['engagement_level'],
+                'first_seen': now,
+                'last_seen': now,
+                'message_count': p['message_count']
+            }
+            for p in profiles
+        ]
+
         try:
-            # For now, use username as ID (in real implementation, use Discord user ID)
-            customer = db.query(PotentialCustomer).filter_by(username=username).first()
-            
-            if not customer:
-                customer = PotentialCustomer(
-                    discord_user_id=username,  # Should be actual Discord ID
-                    username=username,
-                    score=score,
-                    pain_points=list(data['pain_points']),
-                    interests=list(data['interests']),
-                    engagement_level=self._calculate_engagement_level(score, data['message_count']),
-                    first_seen=datetime.utcnow(),
-                    last_seen=datetime.utcnow(),
-                    message_count=data['message_count']
-                )
-                db.add(customer)
-            else:
-                # Update existing customer
-                customer.score = (customer.score + score) / 2  # Average scores
-                customer.pain_points = list(set(customer.pain_points + list(data['pain_points'])))
-                customer.interests = list(set(customer.interests + list(data['interests'])))
-                customer.last_seen = datetime.utcnow()
-                customer.message_count += data['message_count']
-                customer.engagement_level = self._calculate_engagement_level(customer.score, customer.message_count)
-                customer.updated_at = datetime.utcnow()
-            
+            stmt = sqlite_insert(PotentialCustomer).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['discord_user_id'],
+                set_={
+                    'score': (PotentialCustomer.score + stmt.excluded.score) / 2,  # Average scores
+                    'pain_points': _json_array_union(PotentialCustomer.pain_points, stmt.excluded.pain_points),
+                    'interests': _json_array_union(PotentialCustomer.interests, stmt.excluded.interests),
+                    'engagement_level': stmt.excluded.engagement_level,
+                    'last_seen': stmt.excluded.last_seen,
+                    'message_count': PotentialCustomer.message_count + stmt.excluded.message_count,
+                    'updated_at': now
+                }
+            )
+            db.execute(stmt)
             db.commit()
-            
+
         except Exception as e:
-            logger.error(f"Error updating potential customer: {e}")
+            logger.error(f"Error upserting potential customers: {e}")
             db.rollback()
     
     def _calculate_engagement_level(self, score: float, message_count: int) -> str:
@@ -255,22 +475,30 @@ Only include messages with intent_score > 0.3"""
         else:
             return 'low'
     
-    async def _generate_summary(self, potential_customers: List[Dict[str, Any]]) -> str:
+    def _generate_summary(self, channel_id: int, potential_customers: List[Dict[str, Any]], analyzed_count: int) -> str:
         """Generate a summary of the analysis"""
         if not potential_customers:
             return "No potential customers identified in this analysis."
-        
-        top_pain_points = {}
+
+        # Same channel + same number of analyzed messages means the same
+        # summary; reuse the last result instead of recounting
+        cache_key = (channel_id, analyzed_count)
+        cached = self._summary_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        pain_point_counts = Counter()
         for customer in potential_customers:
-            for pain_point in customer['pain_points']:
-                top_pain_points[pain_point] = top_pain_points.get(pain_point, 0) + 1
-        
-        sorted_pain_points = sorted(top_pain_points.items(), key=lambda x: x[1], reverse=True)
-        
+            pain_point_counts.update(customer['pain_points'])
+
         summary = f"Identified {len(potential_customers)} potential customers. "
-        summary += f"Top pain points: {', '.join([pp[0] for pp in sorted_pain_points[:3]])}. "
+        summary += f"Top pain points: {', '.join(pp for pp, _ in pain_point_counts.most_common(3))}. "
         summary += f"High engagement users: {sum(1 for c in potential_customers if c['engagement_level'] == 'high')}"
-        
+
+        if len(self._summary_cache) >= 32:
+            self._summary_cache.clear()
+        self._summary_cache[cache_key] = summary
+
         return summary
     
     def _save_channel_analysis(self, db: Session, channel_id: int, results: Dict[str, Any]):
@@ -301,31 +529,57 @@ Only include messages with intent_score > 0.3"""
     
     async def generate_customer_report(self, db: Session) -> Dict[str, Any]:
         """Generate a comprehensive customer report"""
-        customers = db.query(PotentialCustomer).all()
-        
-        if not customers:
+        # Aggregate the scalar statistics in a single query
+        total_customers, high_priority_count, total_messages = db.execute(
+            select(
+                func.count(PotentialCustomer.id),
+                func.count(PotentialCustomer.id).filter(
+                    PotentialCustomer.engagement_level == 'high'
+                ),
+                func.coalesce(func.sum(PotentialCustomer.message_count), 0)
+            )
+        ).one()
+
+        if not total_customers:
             return {
                 'total_customers': 0,
                 'high_priority_count': 0,
                 'total_messages': 0,
                 'top_pain_points': []
             }
-        
-        # Aggregate pain points
-        all_pain_points = {}
-        for customer in customers:
-            for pain_point in customer.pain_points:
-                all_pain_points[pain_point] = all_pain_points.get(pain_point, 0) + 1
-        
-        sorted_pain_points = sorted(all_pain_points.items(), key=lambda x: x[1], reverse=True)
-        
+
+        # Expand the pain_points JSON arrays and count mentions in the DB
+        pain_point = func.json_each(PotentialCustomer.pain_points).table_valued(
+            'value', joins_implicitly=True
+        )
+        pain_point_rows = db.execute(
+            select(pain_point.c.value, func.count())
+            .select_from(PotentialCustomer, pain_point)
+            .group_by(pain_point.c.value)
+            .order_by(func.count().desc())
+            .limit(10)
+        ).all()
+
+        # Fetch the top 20 as plain row tuples; no ORM instrumentation
+        top_customers = db.execute(
+            select(
+                PotentialCustomer.username,
+                PotentialCustomer.score,
+                PotentialCustomer.engagement_level,
+                PotentialCustomer.pain_points,
+                PotentialCustomer.interests
+            )
+            .order_by(PotentialCustomer.score.desc())
+            .limit(20)
+        ).all()
+
         return {
-            'total_customers': len(customers),
-            'high_priority_count': sum(1 for c in customers if c.engagement_level == 'high'),
-            'total_messages': sum(c.message_count for c in customers),
+            'total_customers': total_customers,
+            'high_priority_count': high_priority_count,
+            'total_messages': total_messages,
             'top_pain_points': [
-                {'pain_point': pp[0], 'count': pp[1]}
-                for pp in sorted_pain_points[:10]
+                {'pain_point': value, 'count': count}
+                for value, count in pain_point_rows
             ],
             'customers': [
                 {
@@ -335,6 +589,6 @@ Only include messages with intent_score > 0.3"""
                     'pain_points': c.pain_points[:5],
                     'interests': c.interests[:5]
                 }
-                for c in sorted(customers, key=lambda x: x.score, reverse=True)[:20]
+                for c in top_customers
             ]
         } 
\ No newline at end of file
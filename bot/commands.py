@@ -4,6 +4,7 @@ from discord import app_commands
 import asyncio
 from typing import Optional
 from datetime import datetime, timedelta
+from sqlalchemy import func, select
 
 from config.settings import settings
 from models.database import get_db, Channel
@@ -57,25 +58,30 @@ class AnalysisCommands(commands.Cog):
         message = await ctx.send(embed=embed)
         
         try:
-            # Fetch messages
-            after_date = datetime.utcnow() - timedelta(days=days)
-            messages = await self.bot.fetch_channel_messages(
-                channel, 
-                limit=limit, 
-                after=after_date
-            )
-            
-            # Update progress
-            embed.description = f"Fetched {len(messages)} messages. Analyzing..."
-            await message.edit(embed=embed)
-            
-            # Save messages to database
-            for db in get_db():
-                await self.bot.save_messages_to_db(db, channel.id, messages)
-            
-            # Analyze messages
-            for db in get_db():
-                db_channel = db.query(Channel).filter_by(discord_id=str(channel.id)).first()
+            # Stream messages into the database and analyze in one session
+            with get_db() as db:
+                db_channel = db.query(Channel).filter_by(discord_id=channel.id).first()
+
+                # Resume from the ingest cursor when it is newer than the
+                # requested window; the 5-minute overlap is deduplicated
+                # by the ON CONFLICT insert path
+                after_date = datetime.utcnow() - timedelta(days=days)
+                if db_channel and db_channel.last_analyzed:
+                    cursor = db_channel.last_analyzed - timedelta(minutes=5)
+                    if cursor > after_date:
+                        after_date = cursor
+
+                batches = self.bot.iter_channel_message_batches(
+                    channel,
+                    limit=limit,
+                    after=after_date
+                )
+                saved = await self.bot.save_messages_to_db(db, channel.id, batches)
+
+                # Update progress
+                embed.description = f"Saved {saved} new messages. Analyzing..."
+                await message.edit(embed=embed)
+
                 if db_channel:
                     analysis_results = await self.analyzer.analyze_channel(db, db_channel.id)
                     
@@ -129,33 +135,42 @@ class AnalysisCommands(commands.Cog):
         )
         
         message = await ctx.send(embed=embed)
-        
-        analyzed = 0
+
+        channels = [
+            channel for channel in ctx.guild.text_channels
+            if channel.permissions_for(ctx.guild.me).read_message_history
+        ]
         total = len(ctx.guild.text_channels)
-        
-        for channel in ctx.guild.text_channels:
-            if not channel.permissions_for(ctx.guild.me).read_message_history:
-                continue
-            
-            try:
-                # Update progress
-                embed.description = f"Analyzing channel {analyzed + 1}/{total}: {channel.mention}"
-                await message.edit(embed=embed)
-                
-                # Fetch and analyze
-                messages = await self.bot.fetch_channel_messages(channel, limit=500)
-                
-                for db in get_db():
-                    await self.bot.save_messages_to_db(db, channel.id, messages)
-                    
-                analyzed += 1
-                
-                # Rate limiting between channels
-                await asyncio.sleep(2)
-                
-            except Exception as e:
-                logger.error(f"Error analyzing {channel.name}: {e}")
-        
+        analyzed = 0
+
+        # Fetch a few channels concurrently; Discord's per-bucket rate
+        # limit makes more than ~5 in flight counterproductive
+        semaphore = asyncio.Semaphore(5)
+        progress_lock = asyncio.Lock()
+
+        async def analyze_one(channel: discord.TextChannel):
+            nonlocal analyzed
+            async with semaphore:
+                try:
+                    with get_db() as db:
+                        db_channel = db.query(Channel).filter_by(discord_id=channel.id).first()
+                        after = None
+                        if db_channel and db_channel.last_analyzed:
+                            after = db_channel.last_analyzed - timedelta(minutes=5)
+
+                        batches = self.bot.iter_channel_message_batches(channel, limit=500, after=after)
+                        await self.bot.save_messages_to_db(db, channel.id, batches)
+
+                    async with progress_lock:
+                        analyzed += 1
+                        embed.description = f"Analyzed {analyzed}/{total} channels..."
+                        await message.edit(embed=embed)
+
+                except Exception as e:
+                    logger.error(f"Error analyzing {channel.name}: {e}")
+
+        await asyncio.gather(*[analyze_one(channel) for channel in channels])
+
         embed.title = "✅ Server Analysis Complete"
         embed.description = f"Analyzed {analyzed}/{total} channels successfully."
         embed.color = discord.Color.green()
@@ -173,7 +188,7 @@ class AnalysisCommands(commands.Cog):
         message = await ctx.send(embed=embed)
         
         try:
-            for db in get_db():
+            with get_db() as db:
                 report = await self.analyzer.generate_customer_report(db)
                 
                 # Create report embed
@@ -236,28 +251,22 @@ class AnalysisCommands(commands.Cog):
             color=discord.Color.blue()
         )
         
-        for db in get_db():
-            channels = db.query(Channel).filter_by(
-                discord_id=str(ctx.guild.id)
-            ).all()
-            
-            analyzed = 0
-            for channel in channels:
-                if channel.last_analyzed:
-                    analyzed += 1
-                    
+        with get_db() as db:
+            # Aggregate in SQL instead of loading every channel row
+            total, analyzed, most_recent = db.execute(
+                select(
+                    func.count(Channel.id),
+                    func.count(Channel.last_analyzed),
+                    func.max(Channel.last_analyzed)
+                ).where(Channel.discord_id == ctx.guild.id)
+            ).one()
+
             embed.add_field(
                 name="Channels Analyzed",
-                value=f"{analyzed}/{len(channels)}",
+                value=f"{analyzed}/{total}",
                 inline=True
             )
-            
-            # Find most recent analysis
-            most_recent = max(
-                (ch.last_analyzed for ch in channels if ch.last_analyzed),
-                default=None
-            )
-            
+
             if most_recent:
                 embed.add_field(
                     name="Last Analysis",
@@ -4,15 +4,26 @@ import asyncio
 from datetime import datetime, timezone
 import logging
 from typing import List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
-from config.settings import settings
-from models.database import get_db, Guild, Channel, Message
+from models.database import get_db, Author, Guild, Channel, Message
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _message_row(msg: discord.Message, channel_pk: int, author_pk: int) -> dict:
+    """Build an insertable row dict from a fetched Discord message"""
+    return {
+        'discord_id': msg.id,
+        'channel_id': channel_pk,
+        'author_id': author_pk,
+        'content': msg.content,
+        'created_at': msg.created_at
+    }
+
 class CustomerAnalyzerBot(commands.Bot):
     def __init__(self):
         intents = discord.Intents.default()
@@ -21,10 +32,28 @@ class CustomerAnalyzerBot(commands.Bot):
         intents.guilds = True
         
         super().__init__(command_prefix='!', intents=intents)
-        
+
+        # Discord channel id -> database primary key; Discord IDs are
+        # immutable so entries never go stale, only missing
+        self._channel_id_cache: dict = {}
+
+        # Author snowflake -> authors.id; an author row is inserted once
+        # per process lifetime instead of repeating name strings per message
+        self._author_id_cache: dict = {}
+
+        # Bound concurrent history fetches; discord.py's HTTP layer
+        # already honors 429 headers within each request
+        self._fetch_semaphore = asyncio.Semaphore(5)
+
+        # Live messages are buffered here and flushed in bulk by the
+        # background flusher instead of one commit per message
+        self._msg_queue: asyncio.Queue = asyncio.Queue(maxsize=5000)
+        self._flusher_task: Optional[asyncio.Task] = None
+
     async def setup_hook(self):
         """Initialize bot extensions and sync commands"""
         await self.load_extension('bot.commands')
+        self._flusher_task = asyncio.create_task(self._flush_loop())
         logger.info("Bot extensions loaded")
         
     async def on_ready(self):
@@ -33,136 +62,283 @@ class CustomerAnalyzerBot(commands.Bot):
         logger.info(f'Connected to {len(self.guilds)} guilds')
         
         # Update guild information in database
-        for db in get_db():
-            for guild in self.guilds:
-                await self.update_guild_info(db, guild)
-            db.commit()
+        with get_db() as db:
+            await self.sync_guilds(db)
+
+            # Warm the channel cache so live messages skip the lookup
+            self._channel_id_cache = {
+                discord_id: pk
+                for discord_id, pk in db.execute(select(Channel.discord_id, Channel.id))
+            }
+
+    async def on_guild_channel_create(self, channel):
+        """Invalidate the channel cache when channels change"""
+        self._channel_id_cache.pop(channel.id, None)
+
+    async def on_guild_channel_delete(self, channel):
+        """Invalidate the channel cache when channels change"""
+        self._channel_id_cache.pop(channel.id, None)
     
-    async def update_guild_info(self, db: Session, guild: discord.Guild):
-        """Update guild information in database"""
-        db_guild = db.query(Guild).filter_by(discord_id=str(guild.id)).first()
-        
-        if not db_guild:
-            db_guild = Guild(
-                discord_id=str(guild.id),
-                name=guild.name
-            )
-            db.add(db_guild)
-            db.flush()
-        else:
-            db_guild.name = guild.name
-            db_guild.updated_at = datetime.utcnow()
-        
-        # Update channels
-        for channel in guild.text_channels:
-            db_channel = db.query(Channel).filter_by(discord_id=str(channel.id)).first()
-            
-            if not db_channel:
-                db_channel = Channel(
-                    discord_id=str(channel.id),
-                    guild_id=db_guild.id,
-                    name=channel.name,
-                    type='text'
-                )
-                db.add(db_channel)
-            else:
-                db_channel.name = channel.name
-                db_channel.updated_at = datetime.utcnow()
+    async def sync_guilds(self, db: Session):
+        """Sync all connected guilds and their text channels in bulk.
+
+        One upsert for guilds, one SELECT for their primary keys, and one
+        upsert for channels — three round-trips for the whole startup sync.
+        """
+        guild_rows = [
+            {'discord_id': guild.id, 'name': guild.name}
+            for guild in self.guilds
+        ]
+        if not guild_rows:
+            return
+
+        guild_stmt = sqlite_insert(Guild).values(guild_rows)
+        db.execute(guild_stmt.on_conflict_do_update(
+            index_elements=['discord_id'],
+            set_={'name': guild_stmt.excluded.name, 'updated_at': func.now()}
+        ))
+
+        guild_pks = {
+            discord_id: pk
+            for discord_id, pk in db.execute(select(Guild.discord_id, Guild.id))
+        }
+
+        channel_rows = [
+            {
+                'discord_id': channel.id,
+                'guild_id': guild_pks[guild.id],
+                'name': channel.name,
+                'type': 'text'
+            }
+            for guild in self.guilds
+            for channel in guild.text_channels
+        ]
+        if channel_rows:
+            channel_stmt = sqlite_insert(Channel).values(channel_rows)
+            db.execute(channel_stmt.on_conflict_do_update(
+                index_elements=['discord_id'],
+                set_={'name': channel_stmt.excluded.name, 'updated_at': func.now()}
+            ))
+
+        db.commit()
     
-    async def fetch_channel_messages(
-        self, 
-        channel: discord.TextChannel, 
+    async def iter_channel_message_batches(
+        self,
+        channel: discord.TextChannel,
         limit: int = 1000,
-        after: Optional[datetime] = None
-    ) -> List[discord.Message]:
-        """Fetch messages from a channel with rate limiting"""
-        messages = []
-        
+        after: Optional[datetime] = None,
+        batch_size: int = 500
+    ):
+        """Yield messages from a channel in batches, bounded by the fetch semaphore"""
+        batch = []
+
         try:
-            async for message in channel.history(limit=limit, after=after, oldest_first=True):
-                messages.append(message)
-                
-                # Rate limiting
-                if len(messages) % 100 == 0:
-                    await asyncio.sleep(settings.DISCORD_RATE_LIMIT_DELAY)
-                    
+            async with self._fetch_semaphore:
+                async for message in channel.history(limit=limit, after=after, oldest_first=True):
+                    batch.append(message)
+
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+
         except discord.Forbidden:
             logger.warning(f"No permission to read messages in {channel.name}")
         except Exception as e:
             logger.error(f"Error fetching messages from {channel.name}: {e}")
-            
-        return messages
-    
-    async def save_messages_to_db(self, db: Session, channel_id: int, messages: List[discord.Message]):
-        """Save messages to database"""
-        db_channel = db.query(Channel).filter_by(discord_id=str(channel_id)).first()
-        
+
+        if batch:
+            yield batch
+
+    async def save_messages_to_db(self, db: Session, channel_id: int, message_batches) -> int:
+        """Save streamed message batches to database, returning the new row count"""
+        db_channel = db.query(Channel).filter_by(discord_id=channel_id).first()
+
         if not db_channel:
             logger.error(f"Channel {channel_id} not found in database")
-            return
-        
+            return 0
+
+        # Small queue so the next Discord fetch is in flight while the
+        # previous batch is being written
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+
+        async def produce():
+            async for batch in message_batches:
+                await queue.put(batch)
+            await queue.put(None)
+
+        producer = asyncio.create_task(produce())
+
         saved_count = 0
-        for msg in messages:
-            # Skip bot messages
-            if msg.author.bot:
-                continue
-                
-            # Check if message already exists
-            existing = db.query(Message).filter_by(discord_id=str(msg.id)).first()
-            if existing:
-                continue
-            
-            db_message = Message(
-                discord_id=str(msg.id),
-                channel_id=db_channel.id,
-                author_id=str(msg.author.id),
-                author_name=msg.author.name,
-                content=msg.content,
-                created_at=msg.created_at.replace(tzinfo=timezone.utc)
+        latest_seen = None
+        try:
+            while (batch := await queue.get()) is not None:
+                if batch:
+                    # History is fetched oldest_first, so the batch tail is newest
+                    newest = batch[-1].created_at
+                    if latest_seen is None or newest > latest_seen:
+                        latest_seen = newest
+                saved_count += await asyncio.to_thread(
+                    self._insert_message_batch, db, db_channel.id, batch
+                )
+            await producer
+
+            # Persist the newest ingested timestamp as the resume cursor, in
+            # the same transaction so one COMMIT covers inserts and cursor;
+            # discord.py timestamps are already timezone-aware UTC
+            if latest_seen is not None:
+                db_channel.last_analyzed = latest_seen
+            else:
+                db_channel.last_analyzed = datetime.now(timezone.utc)
+            db.commit()
+        except Exception:
+            # The caller's session rolls back the uncommitted author rows
+            # inserted along the way, so their cached pks are dangling
+            producer.cancel()
+            self._author_id_cache.clear()
+            raise
+
+        logger.debug(f"Saved {saved_count} new messages from channel {db_channel.name}")
+        return saved_count
+
+    def _resolve_author_pks(self, db: Session, authors) -> dict:
+        """Map author snowflakes to database keys, inserting new authors once.
+
+        One ON CONFLICT DO NOTHING insert plus one SELECT for the cache
+        misses; hits are served from the process-wide cache.
+        """
+        missing = {a.id: a.name for a in authors if a.id not in self._author_id_cache}
+        if missing:
+            db.execute(
+                sqlite_insert(Author)
+                .values([{'discord_id': did, 'name': name} for did, name in missing.items()])
+                .on_conflict_do_nothing(index_elements=['discord_id'])
             )
-            db.add(db_message)
-            saved_count += 1
-            
-            # Commit in batches
-            if saved_count % 100 == 0:
-                db.commit()
-        
-        db.commit()
-        logger.info(f"Saved {saved_count} new messages from channel {db_channel.name}")
-        
-        # Update last analyzed timestamp
-        db_channel.last_analyzed = datetime.utcnow()
-        db.commit()
+            self._author_id_cache.update(
+                db.execute(
+                    select(Author.discord_id, Author.id)
+                    .where(Author.discord_id.in_(missing))
+                ).all()
+            )
+        return self._author_id_cache
+
+    def _insert_message_batch(self, db: Session, channel_pk: int, batch: List[discord.Message]) -> int:
+        """Bulk-insert one batch of fetched messages, skipping duplicates"""
+        # Check .bot once per distinct author rather than per message;
+        # the row comprehension then filters with a plain set lookup
+        authors = {msg.author for msg in batch}
+        bot_ids = {author.id for author in authors if author.bot}
+        author_pks = self._resolve_author_pks(
+            db, [author for author in authors if author.id not in bot_ids]
+        )
+        rows = [
+            _message_row(msg, channel_pk, author_pks[msg.author.id])
+            for msg in batch
+            if msg.author.id not in bot_ids
+        ]
+
+        if not rows:
+            return 0
+
+        # Let the unique index reject duplicates instead of pre-reading
+        # existing ids into Python
+        result = db.execute(
+            sqlite_insert(Message)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=['discord_id'])
+        )
+        return result.rowcount if result.rowcount >= 0 else len(rows)
 
     async def on_message(self, message: discord.Message):
         """Handle new messages"""
         # Don't process bot messages
         if message.author.bot:
             return
-            
+
         # Process commands
         await self.process_commands(message)
-        
-        # Save message to database for real-time analysis (optional)
+
+        # Queue message for the background flusher; dropping under
+        # sustained overload beats blocking the event handler
         if message.guild and isinstance(message.channel, discord.TextChannel):
-            for db in get_db():
-                await self.save_single_message(db, message)
+            try:
+                self._msg_queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning("Message queue full, dropping live message")
 
-    async def save_single_message(self, db: Session, message: discord.Message):
-        """Save a single message to database"""
-        db_channel = db.query(Channel).filter_by(discord_id=str(message.channel.id)).first()
-        
-        if db_channel:
-            db_message = Message(
-                discord_id=str(message.id),
-                channel_id=db_channel.id,
-                author_id=str(message.author.id),
-                author_name=message.author.name,
-                content=message.content,
-                created_at=message.created_at.replace(tzinfo=timezone.utc)
-            )
-            db.add(db_message)
-            db.commit()
+    async def _flush_loop(self):
+        """Drain queued live messages into bulk inserts.
+
+        Collects up to 200 messages or half a second's worth, whichever
+        comes first, so one transaction covers a burst of activity.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._msg_queue.get()]
+            deadline = loop.time() + 0.5
+            while len(batch) < 200:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._msg_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await asyncio.to_thread(self._flush_messages, batch)
+            except Exception as e:
+                # An unexpected error (e.g. a locked database) must not
+                # kill the flusher for the rest of the process; drop the
+                # batch and keep draining
+                logger.error(f"Live-message flush failed: {e}")
+
+    def _flush_messages(self, batch: List[discord.Message]):
+        """Bulk-insert one flusher batch, resolving channel keys from cache"""
+        with get_db() as db:
+            author_pks = self._resolve_author_pks(db, {msg.author for msg in batch})
+
+            rows = []
+            for msg in batch:
+                channel_pk = self._channel_id_cache.get(msg.channel.id)
+                if channel_pk is None:
+                    db_channel = db.query(Channel).filter_by(discord_id=msg.channel.id).first()
+                    if not db_channel:
+                        continue
+                    channel_pk = db_channel.id
+                    self._channel_id_cache[msg.channel.id] = channel_pk
+                rows.append(_message_row(msg, channel_pk, author_pks[msg.author.id]))
+
+            if not rows:
+                return
+
+            try:
+                db.execute(
+                    sqlite_insert(Message)
+                    .values(rows)
+                    .on_conflict_do_nothing(index_elements=['discord_id'])
+                )
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                # Rollback may have discarded freshly inserted author rows
+                self._author_id_cache.clear()
+                logger.error(f"Error flushing live messages: {e}")
+
+    async def close(self):
+        """Flush any buffered messages before shutting down"""
+        if self._flusher_task is not None:
+            self._flusher_task.cancel()
+            try:
+                await self._flusher_task
+            except asyncio.CancelledError:
+                pass
+
+        remaining = []
+        while not self._msg_queue.empty():
+            remaining.append(self._msg_queue.get_nowait())
+        if remaining:
+            await asyncio.to_thread(self._flush_messages, remaining)
+
+        await super().close()
 
 # Create bot instance
 bot = CustomerAnalyzerBot() 
\ No newline at end of file
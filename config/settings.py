@@ -1,65 +1,97 @@
-import os
-from typing import List, Optional
+from functools import cached_property
+from typing import Annotated, List, Optional
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+import ahocorasick
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
+
+class Settings(BaseSettings):
+    """Application settings configuration.
+
+    Parsed once from the environment (and .env) at instantiation; the
+    frozen model makes attribute access a plain read with no re-parsing.
+    """
+
+    model_config = SettingsConfigDict(env_file=".env", frozen=True)
 
-class Settings:
-    """Application settings configuration"""
-    
     # Discord Configuration
-    DISCORD_BOT_TOKEN: str = os.getenv("DISCORD_BOT_TOKEN", "")
-    DISCORD_GUILD_ID: Optional[int] = int(os.getenv("DISCORD_GUILD_ID", "0")) if os.getenv("DISCORD_GUILD_ID") else None
-    
+    DISCORD_BOT_TOKEN: str = ""
+    DISCORD_GUILD_ID: Optional[int] = None
+
     # OpenAI Configuration
-    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
-    OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
-    
+    OPENAI_API_KEY: str = ""
+    OPENAI_MODEL: str = "gpt-4-turbo-preview"
+    OPENAI_CONTEXT_WINDOW: int = 128000
+    OPENAI_MAX_OUTPUT_TOKENS: int = 4096
+
     # Database Configuration
-    DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///discord_analyzer.db")
-    
+    DATABASE_URL: str = "sqlite:///discord_analyzer.db"
+
     # Analysis Configuration
-    MAX_MESSAGES_PER_CHANNEL: int = int(os.getenv("MAX_MESSAGES_PER_CHANNEL", "1000"))
-    ANALYSIS_BATCH_SIZE: int = int(os.getenv("ANALYSIS_BATCH_SIZE", "50"))
-    
+    MAX_MESSAGES_PER_CHANNEL: int = 1000
+    ANALYSIS_BATCH_SIZE: int = 50
+    OPENAI_MAX_CONCURRENCY: int = 5
+    LLM_CACHE_TTL_SECONDS: int = 86400
+
     # Letta Configuration
-    LETTA_API_KEY: Optional[str] = os.getenv("LETTA_API_KEY")
-    USE_LETTA_MEMORY: bool = os.getenv("USE_LETTA_MEMORY", "false").lower() == "true"
-    
-    # Customer Analysis Keywords
-    CUSTOMER_KEYWORDS: List[str] = [
-        k.strip() for k in os.getenv(
-            "CUSTOMER_KEYWORDS", 
-            "looking for,need help with,does anyone know,recommendation,suggest,problem with,issue with,frustrated with,solution for"
-        ).split(",")
+    LETTA_API_KEY: Optional[str] = None
+    USE_LETTA_MEMORY: bool = False
+
+    # Customer Analysis Keywords; NoDecode skips the JSON decoding the
+    # env source applies to list fields, so the validator gets the raw
+    # comma-separated string
+    CUSTOMER_KEYWORDS: Annotated[List[str], NoDecode] = [
+        "looking for", "need help with", "does anyone know", "recommendation",
+        "suggest", "problem with", "issue with", "frustrated with", "solution for"
     ]
-    
+
     # Rate Limiting
-    DISCORD_RATE_LIMIT_DELAY: float = 1.0  # seconds between API calls
-    OPENAI_RATE_LIMIT_DELAY: float = 0.5  # seconds between API calls
-    
+    OPENAI_REQUESTS_PER_MINUTE: int = 60
+    OPENAI_TOKENS_PER_MINUTE: int = 90000
+
     # Paths
     BASE_DIR: Path = Path(__file__).parent.parent
-    DATA_DIR: Path = BASE_DIR / "data"
-    LOGS_DIR: Path = BASE_DIR / "logs"
-    
-    def __init__(self):
-        # Create necessary directories
-        self.DATA_DIR.mkdir(exist_ok=True)
-        self.LOGS_DIR.mkdir(exist_ok=True)
-    
+    DATA_DIR: Path = Path(__file__).parent.parent / "data"
+    LOGS_DIR: Path = Path(__file__).parent.parent / "logs"
+
+    @field_validator("CUSTOMER_KEYWORDS", mode="before")
+    @classmethod
+    def _split_keywords(cls, value):
+        """Accept the historical comma-separated env format"""
+        if isinstance(value, str):
+            return [k.strip() for k in value.split(",")]
+        return value
+
+    @cached_property
+    def _keyword_automaton(self) -> "ahocorasick.Automaton":
+        # Compile keyword matching into one automaton so message scans
+        # are O(len(text)) regardless of how many keywords are configured
+        automaton = ahocorasick.Automaton()
+        for i, keyword in enumerate(self.CUSTOMER_KEYWORDS):
+            automaton.add_word(keyword.lower(), (i, keyword))
+        automaton.make_automaton()
+        return automaton
+
+    def find_keywords(self, text: str) -> List[str]:
+        """Find all customer keywords in text in a single linear pass"""
+        return [keyword for _, (_, keyword) in self._keyword_automaton.iter(text.lower())]
+
     def validate(self) -> List[str]:
         """Validate required settings and return list of errors"""
         errors = []
-        
+
         if not self.DISCORD_BOT_TOKEN:
             errors.append("DISCORD_BOT_TOKEN is required")
-        
+
         if not self.OPENAI_API_KEY:
             errors.append("OPENAI_API_KEY is required")
-            
+
         return errors
 
-settings = Settings() 
\ No newline at end of file
+settings = Settings()
+
+def init_runtime_dirs():
+    """Create data/log directories; called from the entry point, not import"""
+    settings.DATA_DIR.mkdir(exist_ok=True)
+    settings.LOGS_DIR.mkdir(exist_ok=True)
@@ -1,19 +1,17 @@
 import asyncio
 import logging
 from rich.console import Console
-from rich.logging import RichHandler
 
-from config.settings import settings
+from config.settings import settings, init_runtime_dirs
 from models.database import init_db
 from bot.discord_bot import bot
 
-# Setup logging with rich
+# Rich stays for the interactive banner; log records go through a plain
+# handler so formatting stays cheap on the hot path
 console = Console()
 logging.basicConfig(
     level=logging.INFO,
-    format="%(message)s",
-    datefmt="[%X]",
-    handlers=[RichHandler(console=console, rich_tracebacks=True)]
+    format="%(asctime)s %(levelname)s %(name)s %(message)s"
 )
 logger = logging.getLogger(__name__)
 
@@ -29,8 +27,9 @@ async def main():
             console.print(f"  • {error}")
         return
     
-    # Initialize database
+    # Initialize database and runtime directories
     console.print("Initializing database...")
+    init_runtime_dirs()
     init_db()
     console.print("[green]✓[/green] Database initialized")
     
@@ -1,7 +1,8 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, JSON
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event, func, make_url, text, BigInteger, Column, Index, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, JSON
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
-from datetime import datetime
 from config.settings import settings
 
 Base = declarative_base()
@@ -10,10 +11,10 @@ class Guild(Base):
     __tablename__ = 'guilds'
     
     id = Column(Integer, primary_key=True)
-    discord_id = Column(String(50), unique=True, nullable=False)
+    discord_id = Column(BigInteger, unique=True, nullable=False)  # Discord snowflake
     name = Column(String(255), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     channels = relationship("Channel", back_populates="guild", cascade="all, delete-orphan")
 
@@ -21,30 +22,46 @@ class Channel(Base):
     __tablename__ = 'channels'
     
     id = Column(Integer, primary_key=True)
-    discord_id = Column(String(50), unique=True, nullable=False)
+    discord_id = Column(BigInteger, unique=True, nullable=False)  # Discord snowflake
     guild_id = Column(Integer, ForeignKey('guilds.id'), nullable=False)
     name = Column(String(255), nullable=False)
     type = Column(String(50))  # text, voice, etc.
-    last_analyzed = Column(DateTime)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_analyzed = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     guild = relationship("Guild", back_populates="channels")
     messages = relationship("Message", back_populates="channel", cascade="all, delete-orphan")
     analyses = relationship("ChannelAnalysis", back_populates="channel", cascade="all, delete-orphan")
 
+class Author(Base):
+    __tablename__ = 'authors'
+
+    id = Column(Integer, primary_key=True)
+    discord_id = Column(BigInteger, unique=True, nullable=False)  # Discord snowflake
+    name = Column(String(255))
+
+    messages = relationship("Message", back_populates="author")
+
 class Message(Base):
     __tablename__ = 'messages'
-    
+    __table_args__ = (
+        # Per-channel time-range scans and author rollups; created by
+        # create_all for new databases, existing tables need a migration
+        Index('ix_messages_channel_created', 'channel_id', 'created_at'),
+        Index('ix_messages_author', 'author_id'),
+    )
+
     id = Column(Integer, primary_key=True)
-    discord_id = Column(String(50), unique=True, nullable=False)
+    discord_id = Column(BigInteger, unique=True, nullable=False)  # Discord snowflake
     channel_id = Column(Integer, ForeignKey('channels.id'), nullable=False)
-    author_id = Column(String(50), nullable=False)
-    author_name = Column(String(255))
+    author_id = Column(Integer, ForeignKey('authors.id'), nullable=False)
     content = Column(Text)
-    created_at = Column(DateTime, nullable=False)
-    
+    token_count = Column(Integer)  # Cached tiktoken count, filled on first analysis
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
     channel = relationship("Channel", back_populates="messages")
+    author = relationship("Author", back_populates="messages")
     analyses = relationship("MessageAnalysis", back_populates="message", cascade="all, delete-orphan")
 
 class ChannelAnalysis(Base):
@@ -55,7 +72,7 @@ class ChannelAnalysis(Base):
     analysis_type = Column(String(50))  # 'customer_intent', 'sentiment', etc.
     summary = Column(Text)
     insights = Column(JSON)  # Store structured insights
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     channel = relationship("Channel", back_populates="analyses")
 
@@ -69,10 +86,18 @@ class MessageAnalysis(Base):
     sentiment = Column(String(50))  # 'positive', 'negative', 'neutral'
     keywords = Column(JSON)  # List of identified keywords
     insights = Column(Text)  # LLM-generated insights
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     message = relationship("Message", back_populates="analyses")
 
+class LLMResponseCache(Base):
+    __tablename__ = 'llm_response_cache'
+
+    id = Column(Integer, primary_key=True)
+    cache_key = Column(String(64), unique=True, nullable=False)  # sha256 of model + payload
+    response = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class PotentialCustomer(Base):
     __tablename__ = 'potential_customers'
     
@@ -83,23 +108,63 @@ class PotentialCustomer(Base):
     pain_points = Column(JSON)  # List of identified pain points
     interests = Column(JSON)  # List of interests/needs
     engagement_level = Column(String(50))  # 'high', 'medium', 'low'
-    first_seen = Column(DateTime)
-    last_seen = Column(DateTime)
+    first_seen = Column(DateTime(timezone=True))
+    last_seen = Column(DateTime(timezone=True))
     message_count = Column(Integer, default=0)
     notes = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 # Database setup
-engine = create_engine(settings.DATABASE_URL, echo=False)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Sessions are handed to worker threads (asyncio.to_thread), so SQLite
+# connections must not be pinned to their creating thread; the pool is
+# sized for the bot's concurrent fetch/analysis fan-out. In-memory
+# SQLite gets a SingletonThreadPool, which takes no sizing arguments
+_db_url = make_url(settings.DATABASE_URL)
+_is_sqlite = _db_url.get_backend_name() == "sqlite"
+_is_memory_sqlite = _is_sqlite and _db_url.database in (None, "", ":memory:")
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    echo=False,
+    insertmanyvalues_page_size=10000,
+    pool_pre_ping=True,
+    connect_args={"check_same_thread": False} if _is_sqlite else {},
+    **({} if _is_memory_sqlite else {"pool_size": 10, "max_overflow": 20})
+)
+
+if engine.url.get_backend_name() == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Tune SQLite for the bot's write-heavy ingest workload.
+
+        WAL avoids the double fsync of the rollback journal and lets
+        readers proceed while messages are being inserted.
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.close()
+
+# The analyzer commits token counts mid-stream and keeps reading the
+# loaded Message rows afterwards; without this, each commit would expire
+# the identity map and every later attribute access re-SELECTs its row
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
 
+    # Refresh planner statistics so the new indexes get used
+    if engine.url.get_backend_name() == "sqlite":
+        with engine.connect() as conn:
+            conn.execute(text("ANALYZE"))
+
+@contextmanager
 def get_db():
-    """Get database session"""
+    """Get database session as a context manager"""
     db = SessionLocal()
     try:
         yield db
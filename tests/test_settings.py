@@ -0,0 +1,28 @@
+"""Tests for application settings parsing."""
+
+import os
+from unittest.mock import patch
+
+from config.settings import Settings
+
+
+class TestCustomerKeywords:
+    """CUSTOMER_KEYWORDS accepts the documented comma-separated env format"""
+
+    def test_comma_separated_env_format(self):
+        with patch.dict(os.environ, {"CUSTOMER_KEYWORDS": "looking for, need help with,budget"}):
+            settings = Settings()
+
+            assert settings.CUSTOMER_KEYWORDS == ["looking for", "need help with", "budget"]
+
+    def test_default_keywords_without_env(self):
+        with patch.dict(os.environ, {}, clear=True):
+            settings = Settings()
+
+            assert "looking for" in settings.CUSTOMER_KEYWORDS
+
+    def test_find_keywords_uses_configured_keywords(self):
+        with patch.dict(os.environ, {"CUSTOMER_KEYWORDS": "crm,project management"}):
+            settings = Settings()
+
+            assert settings.find_keywords("Looking for a CRM that works") == ["crm"]
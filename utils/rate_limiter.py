@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import logging
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Token-bucket rate limiter for OpenAI API calls.
+
+    Tracks both request and token capacity, replenished continuously from
+    the configured requests-per-minute / tokens-per-minute quotas, so calls
+    proceed as fast as the quota allows instead of sleeping a fixed delay.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.available_request_capacity = float(requests_per_minute)
+        self.available_token_capacity = float(tokens_per_minute)
+        self.last_update_time = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _replenish(self):
+        """Add capacity accrued since the last update"""
+        now = time.monotonic()
+        elapsed = now - self.last_update_time
+        self.available_request_capacity = min(
+            self.requests_per_minute,
+            self.available_request_capacity + elapsed * self.requests_per_minute / 60.0
+        )
+        self.available_token_capacity = min(
+            self.tokens_per_minute,
+            self.available_token_capacity + elapsed * self.tokens_per_minute / 60.0
+        )
+        self.last_update_time = now
+
+    async def acquire(self, estimated_tokens: int):
+        """Wait until there is capacity for one request of estimated_tokens"""
+        # Capacity never exceeds the per-minute quota, so a larger
+        # estimate could never be satisfied and would spin forever while
+        # holding the lock; clamp it to wait for a full bucket instead
+        if estimated_tokens > self.tokens_per_minute:
+            logger.warning(
+                f"Estimated tokens ({estimated_tokens}) exceed the per-minute "
+                f"quota ({self.tokens_per_minute}); clamping to the quota"
+            )
+            estimated_tokens = self.tokens_per_minute
+
+        async with self._lock:
+            while True:
+                self._replenish()
+                if (self.available_request_capacity >= 1
+                        and self.available_token_capacity >= estimated_tokens):
+                    self.available_request_capacity -= 1
+                    self.available_token_capacity -= estimated_tokens
+                    return
+
+                # Sleep just long enough for the token deficit to refill
+                deficit = estimated_tokens - self.available_token_capacity
+                wait = max(deficit / (self.tokens_per_minute / 60.0), 1.0 / (self.requests_per_minute / 60.0))
+                await asyncio.sleep(min(wait, 1.0))
+
+    def release_actual(self, estimated_tokens: int, actual_tokens: int):
+        """Correct capacity once the real usage is known from the response"""
+        self.available_token_capacity -= (actual_tokens - estimated_tokens)